@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import gzip
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from session_files import find_session_files, read_session_csv
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Compare size and read throughput of plain vs compressed session files.")
+    p.add_argument("--raw-sessions-dir", type=str, default="data/raw/sessions")
+    p.add_argument("--files", type=str, default="events.csv,auth_windows.csv")
+    p.add_argument("--repeats", type=int, default=3)
+    return p.parse_args()
+
+
+def available_codecs() -> List[str]:
+    codecs = ["plain", "gzip"]
+    try:
+        import zstandard  # noqa: F401
+
+        codecs.append("zstd")
+    except ImportError:
+        pass
+    return codecs
+
+
+def write_variant(src: Path, dst_dir: Path, codec: str) -> Path:
+    raw = src.read_bytes() if src.suffix == ".csv" else read_session_csv(src).to_csv(index=False).encode("utf-8")
+    name = src.name.split(".csv")[0] + ".csv"
+    if codec == "plain":
+        out = dst_dir / name
+        out.write_bytes(raw)
+    elif codec == "gzip":
+        out = dst_dir / (name + ".gz")
+        out.write_bytes(gzip.compress(raw, compresslevel=6))
+    else:
+        import zstandard
+
+        out = dst_dir / (name + ".zst")
+        out.write_bytes(zstandard.ZstdCompressor(level=3).compress(raw))
+    return out
+
+
+def bench(files: List[Path], codec: str, repeats: int) -> Dict[str, float]:
+    tmp = Path(tempfile.mkdtemp(prefix=f"bench_{codec}_"))
+    try:
+        variants = []
+        for i, f in enumerate(files):
+            d = tmp / str(i)
+            d.mkdir()
+            variants.append(write_variant(f, d, codec))
+        size = sum(v.stat().st_size for v in variants)
+        best = float("inf")
+        rows = 0
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            rows = sum(len(read_session_csv(v)) for v in variants)
+            best = min(best, time.perf_counter() - t0)
+        return {"bytes": float(size), "rows": float(rows), "read_s": best}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main() -> int:
+    args = parse_args()
+    raw = Path(args.raw_sessions_dir)
+    names = [c.strip() for c in args.files.split(",") if c.strip()]
+    codecs = available_codecs()
+
+    for name in names:
+        files = find_session_files(raw, name)
+        if not files:
+            print(f"{name}: no files found under {raw}")
+            continue
+        results = {codec: bench(files, codec, args.repeats) for codec in codecs}
+        plain_bytes = results["plain"]["bytes"]
+        print(f"{name} ({len(files)} session(s))")
+        for codec, r in results.items():
+            print(
+                f"  {codec:<6} {r['bytes'] / 1e6:8.2f} MB  ratio={plain_bytes / r['bytes']:5.2f}x  "
+                f"read={r['read_s']:.3f}s  {r['rows'] / r['read_s']:,.0f} rows/s  "
+                f"{plain_bytes / 1e6 / r['read_s']:.1f} MB/s (uncompressed)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
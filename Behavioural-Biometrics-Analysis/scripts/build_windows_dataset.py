@@ -8,6 +8,8 @@ from typing import List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+from session_files import read_session_csv, resolve_session_file
+
 
 DEFAULT_FEATURES = [
     "schemaVersion",
@@ -113,11 +115,11 @@ def coerce_presence(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def build_session(session_dir: Path, keep_features: List[str], required_schema_version: int) -> Optional[pd.DataFrame]:
-    auth = session_dir / "auth_windows.csv"
-    if not auth.exists():
+    auth = resolve_session_file(session_dir, "auth_windows.csv")
+    if auth is None:
         return None
 
-    df = pd.read_csv(auth)
+    df = read_session_csv(auth)
     sid = session_dir.name
 
     missing_required = [c for c in REQUIRED_SCHEMA_COLUMNS if c not in df.columns]
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+IDS = ["participantId", "sessionId", "windowIndex"]
+MAX_LISTED_KEYS = 20
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Structural diff of two windows dataset builds keyed on (participantId, sessionId, windowIndex)."
+    )
+    p.add_argument("old", type=str, help="Baseline windows.parquet/windows.csv file or partitioned directory")
+    p.add_argument("new", type=str, help="Candidate windows.parquet/windows.csv file or partitioned directory")
+    p.add_argument("--batch-size", type=int, default=65536)
+    p.add_argument(
+        "--bucket-rows", type=int, default=250000, help="Max changed-row candidates loaded per pass over the inputs"
+    )
+    p.add_argument("--ignore-columns", type=str, default="")
+    p.add_argument("--reports-dir", type=str, default="")
+    p.add_argument("--out-json", type=str, default="windows_diff.json")
+    p.add_argument("--out-md", type=str, default="windows_diff.md")
+    return p.parse_args()
+
+
+def open_dataset(path: Path):
+    import pyarrow.dataset as ds
+
+    if path.is_dir():
+        return ds.dataset(str(path), format="parquet", partitioning="hive")
+    fmt = "csv" if path.suffix.lower() == ".csv" else "parquet"
+    return ds.dataset(str(path), format=fmt)
+
+
+def iter_batches(path: Path, columns: Optional[List[str]], batch_size: int) -> Iterator[pd.DataFrame]:
+    dataset = open_dataset(path)
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def dataset_columns(path: Path) -> List[str]:
+    return list(open_dataset(path).schema.names)
+
+
+def normalize_keys(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    out["participantId"] = df["participantId"].astype("string").fillna("")
+    out["sessionId"] = df["sessionId"].astype("string").fillna("")
+    out["windowIndex"] = pd.to_numeric(df["windowIndex"], errors="coerce").astype("Int64")
+    return out
+
+
+def normalize_values(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype("string")
+        if pd.api.types.is_bool_dtype(s):
+            out[c] = s.astype("boolean").astype("Float64")
+        elif pd.api.types.is_numeric_dtype(s):
+            out[c] = pd.to_numeric(s, errors="coerce").astype("Float64")
+        else:
+            out[c] = s.astype("string")
+    return out
+
+
+def scan_row_hashes(path: Path, value_cols: List[str], batch_size: int) -> Tuple[pd.DataFrame, int]:
+    frames = []
+    for batch in iter_batches(path, IDS + value_cols, batch_size):
+        keys = normalize_keys(batch)
+        keys["row_hash"] = pd.util.hash_pandas_object(normalize_values(batch[value_cols]), index=False).to_numpy()
+        frames.append(keys)
+    if not frames:
+        empty = pd.DataFrame({c: pd.Series(dtype=t) for c, t in zip(IDS, ["string", "string", "Int64"])})
+        empty["row_hash"] = pd.Series(dtype="uint64")
+        return empty, 0
+    hashed = pd.concat(frames, ignore_index=True)
+    dup = hashed.duplicated(IDS, keep="first")
+    return hashed[~dup].reset_index(drop=True), int(dup.sum())
+
+
+def key_bucket(keys: pd.DataFrame, n_buckets: int) -> np.ndarray:
+    return pd.util.hash_pandas_object(normalize_keys(keys), index=False).to_numpy() % np.uint64(n_buckets)
+
+
+def collect_rows(
+    path: Path, wanted: pd.DataFrame, value_cols: List[str], batch_size: int, bucket: int = 0, n_buckets: int = 1
+) -> pd.DataFrame:
+    frames = []
+    if len(wanted) == 0:
+        return pd.DataFrame(columns=IDS + value_cols)
+    for batch in iter_batches(path, IDS + value_cols, batch_size):
+        if n_buckets > 1:
+            batch = batch[key_bucket(batch, n_buckets) == bucket]
+        keyed = pd.concat([normalize_keys(batch), normalize_values(batch[value_cols])], axis=1)
+        hit = keyed.merge(wanted, on=IDS, how="inner")
+        if len(hit):
+            frames.append(hit)
+    if not frames:
+        return pd.DataFrame(columns=IDS + value_cols)
+    return pd.concat(frames, ignore_index=True).drop_duplicates(IDS, keep="first")
+
+
+def column_changes(old_rows: pd.DataFrame, new_rows: pd.DataFrame, value_cols: List[str]) -> Tuple[pd.DataFrame, Dict[str, dict]]:
+    both = old_rows.merge(new_rows, on=IDS, how="inner", suffixes=("__old", "__new"))
+    changed_any = np.zeros(len(both), dtype=bool)
+    per_col: Dict[str, dict] = {}
+    for c in value_cols:
+        a = both[f"{c}__old"]
+        b = both[f"{c}__new"]
+        if a.dtype != b.dtype:
+            a, b = a.astype("string"), b.astype("string")
+        a_na = a.isna().to_numpy()
+        b_na = b.isna().to_numpy()
+        eq = (a == b).fillna(False).to_numpy(dtype=bool)
+        diff = ~((a_na & b_na) | eq)
+        n = int(diff.sum())
+        if not n:
+            continue
+        changed_any |= diff
+        info: dict = {"changed_rows": n}
+        if pd.api.types.is_float_dtype(a) and pd.api.types.is_float_dtype(b):
+            delta = (b - a).abs().to_numpy(dtype=float, na_value=np.nan)[diff]
+            finite = delta[np.isfinite(delta)]
+            info["max_abs_delta"] = float(finite.max()) if finite.size else None
+            info["null_changes"] = int((a_na != b_na)[diff].sum())
+        per_col[c] = info
+    return both.loc[changed_any, IDS].reset_index(drop=True), per_col
+
+
+def merge_column_changes(total: Dict[str, dict], part: Dict[str, dict]) -> None:
+    for c, info in part.items():
+        acc = total.get(c)
+        if acc is None:
+            total[c] = dict(info)
+            continue
+        acc["changed_rows"] += info["changed_rows"]
+        if "max_abs_delta" in info:
+            deltas = [d for d in (acc["max_abs_delta"], info["max_abs_delta"]) if d is not None]
+            acc["max_abs_delta"] = max(deltas) if deltas else None
+            acc["null_changes"] += info["null_changes"]
+
+
+def key_list(df: pd.DataFrame) -> List[dict]:
+    out = []
+    for row in df.head(MAX_LISTED_KEYS).itertuples(index=False):
+        out.append({
+            "participantId": str(row.participantId),
+            "sessionId": str(row.sessionId),
+            "windowIndex": None if pd.isna(row.windowIndex) else int(row.windowIndex),
+        })
+    return out
+
+
+def diff_datasets(old: Path, new: Path, batch_size: int, ignore: List[str], bucket_rows: int = 250000) -> dict:
+    old_cols = dataset_columns(old)
+    new_cols = dataset_columns(new)
+    for side, cols in (("old", old_cols), ("new", new_cols)):
+        missing = [c for c in IDS if c not in cols]
+        if missing:
+            raise ValueError(f"{side} dataset missing key columns: {missing}")
+
+    value_cols = [c for c in old_cols if c in new_cols and c not in IDS and c not in ignore]
+    old_hashed, old_dups = scan_row_hashes(old, value_cols, batch_size)
+    new_hashed, new_dups = scan_row_hashes(new, value_cols, batch_size)
+
+    joined = old_hashed.merge(new_hashed, on=IDS, how="outer", suffixes=("_old", "_new"), indicator=True)
+    removed = joined.loc[joined["_merge"] == "left_only", IDS].sort_values(IDS, kind="mergesort")
+    added = joined.loc[joined["_merge"] == "right_only", IDS].sort_values(IDS, kind="mergesort")
+    common = joined[joined["_merge"] == "both"]
+    candidates = common.loc[common["row_hash_old"] != common["row_hash_new"], IDS].reset_index(drop=True)
+
+    # Candidates are split by key hash so each pass loads at most ~bucket_rows rows per side;
+    # only per-column counts, max deltas and the first changed keys are carried between passes.
+    n_buckets = max(1, -(-len(candidates) // max(1, bucket_rows)))
+    buckets = key_bucket(candidates, n_buckets) if n_buckets > 1 else np.zeros(len(candidates), dtype=np.uint64)
+    n_changed = 0
+    changed = candidates.iloc[:0]
+    per_col: Dict[str, dict] = {}
+    for bucket in range(n_buckets):
+        wanted = candidates[buckets == bucket]
+        if len(wanted) == 0:
+            continue
+        old_rows = collect_rows(old, wanted, value_cols, batch_size, bucket, n_buckets)
+        new_rows = collect_rows(new, wanted, value_cols, batch_size, bucket, n_buckets)
+        part_keys, part_cols = column_changes(old_rows, new_rows, value_cols)
+        del old_rows, new_rows
+        n_changed += len(part_keys)
+        merge_column_changes(per_col, part_cols)
+        changed = pd.concat([changed, part_keys], ignore_index=True).sort_values(IDS, kind="mergesort").head(MAX_LISTED_KEYS)
+
+    return {
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "old": str(old),
+        "new": str(new),
+        "old_rows": int(len(old_hashed)),
+        "new_rows": int(len(new_hashed)),
+        "old_duplicate_keys": old_dups,
+        "new_duplicate_keys": new_dups,
+        "columns_removed": [c for c in old_cols if c not in new_cols],
+        "columns_added": [c for c in new_cols if c not in old_cols],
+        "columns_compared": value_cols,
+        "rows_added": int(len(added)),
+        "rows_removed": int(len(removed)),
+        "rows_changed": int(n_changed),
+        "rows_unchanged": int(len(common) - n_changed),
+        "column_changes": dict(sorted(per_col.items(), key=lambda kv: -kv[1]["changed_rows"])),
+        "added_keys": key_list(added),
+        "removed_keys": key_list(removed),
+        "changed_keys": key_list(changed),
+    }
+
+
+def is_identical(summary: dict) -> bool:
+    return not (
+        summary["rows_added"]
+        or summary["rows_removed"]
+        or summary["rows_changed"]
+        or summary["columns_added"]
+        or summary["columns_removed"]
+        or summary["old_duplicate_keys"]
+        or summary["new_duplicate_keys"]
+    )
+
+
+def render_md(summary: dict) -> str:
+    lines = [
+        "# Windows Dataset Diff",
+        "",
+        f"- **Generated:** {summary['generated_at_utc']}",
+        f"- **Old:** `{summary['old']}` ({summary['old_rows']} rows)",
+        f"- **New:** `{summary['new']}` ({summary['new_rows']} rows)",
+        f"- **Verdict:** **{'IDENTICAL' if is_identical(summary) else 'DIFFERENT'}**",
+        "",
+        "## Rows",
+        f"- Added: **{summary['rows_added']}**",
+        f"- Removed: **{summary['rows_removed']}**",
+        f"- Changed: **{summary['rows_changed']}**",
+        f"- Unchanged: **{summary['rows_unchanged']}**",
+        "",
+    ]
+    if summary["old_duplicate_keys"] or summary["new_duplicate_keys"]:
+        lines += [
+            "## Duplicate keys",
+            f"- Old: {summary['old_duplicate_keys']}",
+            f"- New: {summary['new_duplicate_keys']}",
+            "",
+        ]
+    if summary["columns_added"] or summary["columns_removed"]:
+        lines.append("## Schema")
+        lines += [f"- added `{c}`" for c in summary["columns_added"]]
+        lines += [f"- removed `{c}`" for c in summary["columns_removed"]]
+        lines.append("")
+    if summary["column_changes"]:
+        lines.append("## Column changes")
+        lines.append("")
+        for col, info in summary["column_changes"].items():
+            extra = ""
+            if "max_abs_delta" in info:
+                delta = info["max_abs_delta"]
+                extra = f", max |delta|={'n/a' if delta is None else f'{delta:g}'}, null changes={info['null_changes']}"
+            lines.append(f"- `{col}`: {info['changed_rows']} rows{extra}")
+        lines.append("")
+    for title, key in (("Added keys", "added_keys"), ("Removed keys", "removed_keys"), ("Changed keys", "changed_keys")):
+        if summary[key]:
+            lines.append(f"## {title} (first {MAX_LISTED_KEYS})")
+            for k in summary[key]:
+                lines.append(f"- `{k['participantId']}` / `{k['sessionId']}` / {k['windowIndex']}")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    args = parse_args()
+    ignore = [c.strip() for c in args.ignore_columns.split(",") if c.strip()]
+    summary = diff_datasets(Path(args.old), Path(args.new), args.batch_size, ignore, args.bucket_rows)
+    md = render_md(summary)
+
+    if args.reports_dir:
+        reports = Path(args.reports_dir)
+        reports.mkdir(parents=True, exist_ok=True)
+        (reports / args.out_json).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        (reports / args.out_md).write_text(md, encoding="utf-8")
+        print(f"Wrote {reports / args.out_json}")
+        print(f"Wrote {reports / args.out_md}")
+    else:
+        print(md)
+
+    return 0 if is_identical(summary) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
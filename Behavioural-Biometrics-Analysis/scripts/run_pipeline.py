@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Stage:
+    name: str
+    title: str
+    cmd: List[str]
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    allow_failure: bool = False
+    cacheable: bool = True
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run sync, validation, QC and build with dependency-aware scheduling.")
+    p.add_argument("--python", type=str, default=sys.executable)
+    p.add_argument("--raw-sessions-dir", type=str, default="data/raw/sessions")
+    p.add_argument("--reports-dir", type=str, default="reports")
+    p.add_argument("--out-dir", type=str, default="data/processed")
+    p.add_argument("--cache-file", type=str, default="data/.pipeline_cache.json")
+    p.add_argument("--jobs", type=int, default=4)
+    p.add_argument("--skip-sync", action="store_true")
+    p.add_argument("--force", action="store_true", help="Ignore cached stage results and re-run everything")
+    return p.parse_args()
+
+
+def pipeline_stages(args: argparse.Namespace) -> List[Stage]:
+    py = args.python
+    raw, reports, out = args.raw_sessions_dir, args.reports_dir, args.out_dir
+    common = ["scripts/session_files.py"]
+    stages = []
+    if not args.skip_sync:
+        stages.append(Stage(
+            name="sync",
+            title="Syncing Firebase Storage sessions (optional)",
+            cmd=[py, "scripts/sync_storage_sessions.py"],
+            allow_failure=True,
+            cacheable=False,
+        ))
+    deps = [] if args.skip_sync else ["sync"]
+    stages += [
+        Stage(
+            name="validate",
+            title="Running prelaunch session validation",
+            cmd=[py, "scripts/validate_raw_sessions.py", "--raw-sessions-dir", raw, "--reports-dir", reports],
+            inputs=[raw, "scripts/validate_raw_sessions.py"] + common,
+            outputs=[f"{reports}/prelaunch_validation.json", f"{reports}/prelaunch_validation.md"],
+            deps=deps,
+        ),
+        Stage(
+            name="qc",
+            title="Running QC checks",
+            cmd=[py, "scripts/run_qc.py", "--raw-sessions-dir", raw, "--reports-dir", reports],
+            inputs=[raw, "scripts/run_qc.py"] + common,
+            outputs=[f"{reports}/qc_summary.json", f"{reports}/qc_summary.md"],
+            deps=deps,
+        ),
+        Stage(
+            name="build",
+            title="Building modelling dataset",
+            cmd=[py, "scripts/build_windows_dataset.py", "--raw-sessions-dir", raw, "--out-dir", out, "--write-csv"],
+            inputs=[raw, "scripts/build_windows_dataset.py"] + common,
+            outputs=[f"{out}/windows.parquet", f"{out}/windows.csv"],
+            deps=["validate", "qc"],
+        ),
+    ]
+    return stages
+
+
+class FileHasher:
+    """Content hashes keyed by path, reused while (size, mtime) is unchanged."""
+
+    def __init__(self, memo: Dict[str, list]):
+        self.memo = memo
+        self.touched: set = set()
+
+    def file_digest(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path)
+        self.touched.add(key)
+        hit = self.memo.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.memo[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def stage_key(self, stage: Stage) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps(stage.cmd).encode("utf-8"))
+        for inp in stage.inputs:
+            p = ROOT / inp
+            files = sorted(f for f in p.rglob("*") if f.is_file()) if p.is_dir() else [p]
+            for f in files:
+                # relpath, not relative_to: inputs may live outside the analysis dir.
+                h.update(os.path.relpath(f, ROOT).encode("utf-8"))
+                h.update(self.file_digest(f).encode("ascii") if f.exists() else b"<missing>")
+        return h.hexdigest()
+
+
+def load_cache(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"stages": {}, "files": {}}
+    data.setdefault("stages", {})
+    data.setdefault("files", {})
+    return data
+
+
+def run_stage(stage: Stage) -> Tuple[int, str]:
+    proc = subprocess.run(stage.cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return proc.returncode, proc.stdout
+
+
+def run_pipeline(stages: List[Stage], cache: dict, jobs: int, force: bool) -> int:
+    hasher = FileHasher(cache["files"])
+    order = {s.name: i + 1 for i, s in enumerate(stages)}
+    by_name = {s.name: s for s in stages}
+    status: Dict[str, str] = {}
+    keys: Dict[str, Optional[str]] = {}
+    exit_code = 0
+
+    def cached(stage: Stage) -> bool:
+        if not stage.cacheable:
+            return False
+        keys[stage.name] = hasher.stage_key(stage)
+        if force:
+            return False
+        prev = cache["stages"].get(stage.name, {})
+        outputs_ok = all((ROOT / o).exists() for o in stage.outputs)
+        return prev.get("key") == keys[stage.name] and outputs_ok
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running: Dict[Future, Stage] = {}
+        while len(status) < len(stages):
+            for stage in stages:
+                if stage.name in status or any(f is stage for f in running.values()):
+                    continue
+                dep_states = [status.get(d) for d in stage.deps if d in by_name]
+                if any(d is None for d in dep_states):
+                    continue
+                if any(d in ("failed", "skipped") for d in dep_states):
+                    status[stage.name] = "skipped"
+                    print(f"{order[stage.name]}) {stage.title}: skipped (upstream failure)")
+                    continue
+                if cached(stage):
+                    status[stage.name] = "cached"
+                    print(f"{order[stage.name]}) {stage.title}: up to date, skipped")
+                    continue
+                print(f"{order[stage.name]}) {stage.title}")
+                running[pool.submit(run_stage, stage)] = stage
+
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage = running.pop(fut)
+                code, output = fut.result()
+                if output:
+                    prefix = f"[{stage.name}] "
+                    print("\n".join(prefix + line for line in output.rstrip("\n").splitlines()))
+                if code == 0:
+                    status[stage.name] = "ok"
+                    if stage.cacheable:
+                        cache["stages"][stage.name] = {
+                            "key": keys[stage.name],
+                            "completed_at_utc": datetime.now(timezone.utc).isoformat(),
+                        }
+                elif stage.allow_failure:
+                    status[stage.name] = "ok"
+                    print(f"WARNING: {stage.name} failed (exit {code}); continuing with local data.")
+                else:
+                    status[stage.name] = "failed"
+                    cache["stages"].pop(stage.name, None)
+                    print(f"ERROR: {stage.name} failed (exit {code}).")
+                    exit_code = exit_code or code
+
+    # Drop memo entries for files not seen this run (deleted or renamed sessions).
+    cache["files"] = {k: v for k, v in cache["files"].items() if k in hasher.touched}
+    return exit_code
+
+
+def main() -> int:
+    args = parse_args()
+    for d in (args.reports_dir, args.out_dir):
+        (ROOT / d).mkdir(parents=True, exist_ok=True)
+    print(f"Using Python: {args.python}")
+
+    cache_path = ROOT / args.cache_file
+    cache = load_cache(cache_path)
+    code = run_pipeline(pipeline_stages(args), cache, args.jobs, args.force)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+
+    if code:
+        return code
+    print("Pipeline complete.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,23 +16,4 @@ PY
   fi
 fi
 
-mkdir -p reports data/processed
-echo "Using Python: $PYTHON_BIN"
-
-echo "1) Syncing Firebase Storage sessions (optional)"
-if "$PYTHON_BIN" scripts/sync_storage_sessions.py; then
-  echo "Sync complete."
-else
-  echo "WARNING: Storage sync failed; continuing with local data."
-fi
-
-echo "2) Running prelaunch session validation"
-"$PYTHON_BIN" scripts/validate_raw_sessions.py --raw-sessions-dir data/raw/sessions --reports-dir reports
-
-echo "3) Running QC checks"
-"$PYTHON_BIN" scripts/run_qc.py --raw-sessions-dir data/raw/sessions --reports-dir reports
-
-echo "4) Building modelling dataset"
-"$PYTHON_BIN" scripts/build_windows_dataset.py --raw-sessions-dir data/raw/sessions --out-dir data/processed --write-csv
-
-echo "Pipeline complete."
+exec "$PYTHON_BIN" scripts/run_pipeline.py --python "$PYTHON_BIN" "$@"
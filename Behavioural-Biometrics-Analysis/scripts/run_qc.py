@@ -3,13 +3,17 @@ from __future__ import annotations
 
 import argparse
 import json
+import math
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Tuple
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from session_files import find_session_files, read_session_csv
+
 
 DEFAULT_CORE_FEATURES = [
     "schemaVersion",
@@ -35,6 +39,9 @@ DEFAULT_CORE_FEATURES = [
     "tap_drift_rt",
 ]
 
+PRESENCE_THRESHOLDS = [0.05, 0.20]
+MISSINGNESS_THRESHOLDS = [0.60, 0.90]
+
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser()
@@ -43,18 +50,24 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--core-features", type=str, default=",".join(DEFAULT_CORE_FEATURES))
     p.add_argument("--strict", action="store_true")
     p.add_argument("--required-schema-version", type=int, default=2)
+    p.add_argument("--approx", action="store_true", help="Estimate the gate from sampled sessions/windows")
+    p.add_argument("--approx-confidence", type=float, default=0.95)
+    p.add_argument("--approx-batch-sessions", type=int, default=20)
+    p.add_argument("--approx-max-session-frac", type=float, default=0.5)
+    p.add_argument("--approx-window-frac", type=float, default=1.0)
+    p.add_argument("--seed", type=int, default=0)
     return p.parse_args()
 
 
 def find_auth_files(raw_sessions_dir: Path) -> List[Path]:
-    return sorted(raw_sessions_dir.glob("*/auth_windows.csv")) if raw_sessions_dir.exists() else []
+    return find_session_files(raw_sessions_dir, "auth_windows.csv")
 
 
 def load_auth(auth_files: List[Path]) -> pd.DataFrame:
     frames = []
     for f in auth_files:
         sid = f.parent.name
-        df = pd.read_csv(f)
+        df = read_session_csv(f)
         if "sessionId" not in df.columns:
             df["sessionId"] = sid
         df["sessionId"] = df["sessionId"].fillna(sid).astype(str)
@@ -98,7 +111,7 @@ def windows_per_session(auth_files: List[Path]) -> Dict[str, int]:
     for f in auth_files:
         sid = f.parent.name
         try:
-            out[sid] = int(len(pd.read_csv(f)))
+            out[sid] = int(len(read_session_csv(f)))
         except Exception:
             out[sid] = 0
     return out
@@ -148,6 +161,230 @@ def gate(ver: dict, strict: bool) -> Tuple[str, List[str], List[str]]:
     return "PASS", fails, warns
 
 
+def exact_summary(
+    auth_files: List[Path], raw_sessions_dir: Path, core_features: List[str], required_schema_version: int
+) -> dict:
+    df = load_auth(auth_files)
+    wps = windows_per_session(auth_files)
+    participants = int(df["participantId"].nunique(dropna=True)) if "participantId" in df.columns else 0
+    typing_presence, typing_src = inferred_presence_frac(
+        df, "has_typing", ["typing_ikt_global_mean", "typing_ikt_within_mean", "ikt_mean"]
+    )
+    tapping_presence, tapping_src = inferred_presence_frac(
+        df, "has_tapping", ["tap_rt_mean"]
+    )
+    schema_bad_rows = 0
+    if "schemaVersion" in df.columns:
+        v = pd.to_numeric(df["schemaVersion"], errors="coerce")
+        schema_bad_rows = int((v.isna() | (v != required_schema_version)).sum())
+
+    return {
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "raw_sessions_dir": str(raw_sessions_dir),
+        "auth_windows_files_found": len(auth_files),
+        "participants_count": participants,
+        "sessions_count": len(auth_files),
+        "total_windows": int(len(df)),
+        "schema_bad_rows": schema_bad_rows,
+        "windows_per_session": wps,
+        "typing_presence": typing_presence,
+        "tapping_presence": tapping_presence,
+        "typing_presence_source": typing_src,
+        "tapping_presence_source": tapping_src,
+        "missingness_core": missingness_report(df, core_features),
+    }
+
+
+def sample_session(f: Path, window_frac: float, rng: np.random.Generator) -> pd.DataFrame:
+    if window_frac >= 1.0:
+        return read_session_csv(f)
+    return read_session_csv(f, skiprows=lambda i: i > 0 and bool(rng.random() >= window_frac))
+
+
+def schema_scan(auth_files: List[Path], required_schema_version: int) -> Tuple[int, int, Dict[str, int]]:
+    """Bad-schema rows, participant count and window counts for every session in one pass.
+
+    pyarrow only converts the two requested columns, which is far cheaper than a pandas read.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    cols = ["schemaVersion", "participantId"]
+    opts = pacsv.ConvertOptions(
+        include_columns=cols, include_missing_columns=True, column_types={c: pa.string() for c in cols}
+    )
+    tables: Dict[str, Optional[pa.Table]] = {}
+    has_schema: Dict[str, bool] = {}
+    for f in auth_files:
+        sid = f.parent.name
+        try:
+            t = pacsv.read_csv(str(f), convert_options=opts)
+            # A missing column comes back all-null; a present one holds strings ("" when blank).
+            # Header-only files need their header read to tell the two apart.
+            if t.num_rows:
+                has_schema[sid] = t.column("schemaVersion").null_count < t.num_rows
+            else:
+                has_schema[sid] = "schemaVersion" in pacsv.open_csv(str(f)).schema.names
+            tables[sid] = t
+        except (pa.ArrowInvalid, OSError):
+            tables[sid], has_schema[sid] = None, False
+
+    any_schema = any(has_schema.values())
+    bad = 0
+    schema_chunks, participant_chunks = [], []
+    wps: Dict[str, int] = {}
+    for sid, t in tables.items():
+        wps[sid] = 0 if t is None else int(t.num_rows)
+        if t is None or t.num_rows == 0:
+            continue
+        if has_schema[sid]:
+            schema_chunks += t.column("schemaVersion").chunks
+        elif any_schema:
+            # Matches the exact path, where the concatenated column is NaN for these rows.
+            bad += t.num_rows
+        participant_chunks += t.column("participantId").chunks
+    if schema_chunks:
+        v = pd.to_numeric(pa.chunked_array(schema_chunks, pa.string()).to_pandas(), errors="coerce")
+        bad += int((v.isna() | (v != required_schema_version)).sum())
+    participants = set(pa.chunked_array(participant_chunks, pa.string()).unique().to_pylist()) - {None, ""}
+    return bad, len(participants), wps
+
+
+def ratio_estimate(y: np.ndarray, n: np.ndarray, fpc: float, z: float) -> Tuple[float, float]:
+    total = float(n.sum())
+    m = len(n)
+    if total <= 0:
+        return 0.0, math.inf
+    p = float(y.sum()) / total
+    if m < 2:
+        return p, math.inf
+    resid = y - p * n
+    nbar = total / m
+    var = fpc * float((resid ** 2).sum()) / (m * (m - 1) * nbar ** 2)
+    # Agresti-Coull floor on the number of sessions: identical sampled sessions
+    # (e.g. none with tapping) give zero cluster variance but say little about the rest.
+    p_adj = (m * p + z * z / 2) / (m + z * z)
+    floor = fpc * p_adj * (1 - p_adj) / (m + z * z)
+    return p, math.sqrt(max(var, floor))
+
+
+def band(x: float, thresholds: List[float]) -> int:
+    return sum(x >= t for t in thresholds)
+
+
+def interval(p: float, se: float, z: float) -> Tuple[float, float]:
+    return max(0.0, p - z * se), min(1.0, p + z * se)
+
+
+def approximate_summary(
+    auth_files: List[Path],
+    raw_sessions_dir: Path,
+    core_features: List[str],
+    required_schema_version: int,
+    confidence: float,
+    batch_sessions: int,
+    max_session_frac: float,
+    window_frac: float,
+    seed: int,
+) -> Tuple[Optional[dict], dict]:
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(auth_files))
+    total_sessions = len(auth_files)
+    budget = min(total_sessions, max(2, int(math.ceil(max_session_frac * total_sessions))))
+    batch_sessions = max(1, batch_sessions)
+    max_looks = int(math.ceil(budget / batch_sessions))
+    # Bonferroni over the three gated estimates and every planned look, so the
+    # early-stopped verdict holds jointly at the stated confidence.
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / (6 * max_looks))
+
+    schema_bad_rows, participants, wps = schema_scan(auth_files, required_schema_version)
+    rows: List[dict] = []
+    seen_cols: set = set()
+    typing_src = tapping_src = "none"
+    info: dict = {"confidence": confidence, "sessions_total": total_sessions, "looks": 0, "max_looks": max_looks}
+
+    for start in range(0, total_sessions, batch_sessions):
+        for idx in order[start:start + batch_sessions]:
+            f = auth_files[int(idx)]
+            df = sample_session(f, window_frac, rng)
+            if "sessionId" not in df.columns:
+                df["sessionId"] = f.parent.name
+            seen_cols.update(df.columns)
+            tp, typing_src = inferred_presence_frac(
+                df, "has_typing", ["typing_ikt_global_mean", "typing_ikt_within_mean", "ikt_mean"]
+            )
+            pp, tapping_src = inferred_presence_frac(df, "has_tapping", ["tap_rt_mean"])
+            n = len(df)
+            missing = {c: (int(df[c].isna().sum()) if c in df.columns else n) for c in core_features}
+            rows.append({"n": n, "typing": tp * n, "tapping": pp * n, "missing": missing})
+
+        m = len(rows)
+        n_arr = np.array([r["n"] for r in rows], dtype=float)
+        fpc = (1 - m / total_sessions) if window_frac >= 1.0 else 1.0
+        present = [c for c in core_features if c in seen_cols]
+        typing_p, typing_se = ratio_estimate(np.array([r["typing"] for r in rows]), n_arr, fpc, z)
+        tapping_p, tapping_se = ratio_estimate(np.array([r["tapping"] for r in rows]), n_arr, fpc, z)
+        if present:
+            miss_y = np.array([np.mean([r["missing"][c] for c in present]) for r in rows])
+            miss_p, miss_se = ratio_estimate(miss_y, n_arr, fpc, z)
+        else:
+            miss_p, miss_se = 1.0, 0.0
+
+        bounds = {
+            "typing_presence": interval(typing_p, typing_se, z),
+            "tapping_presence": interval(tapping_p, tapping_se, z),
+            "core_missingness_avg": interval(miss_p, miss_se, z),
+        }
+        settled = (
+            band(bounds["typing_presence"][0], PRESENCE_THRESHOLDS) == band(bounds["typing_presence"][1], PRESENCE_THRESHOLDS)
+            and band(bounds["tapping_presence"][0], PRESENCE_THRESHOLDS) == band(bounds["tapping_presence"][1], PRESENCE_THRESHOLDS)
+            and band(bounds["core_missingness_avg"][0], MISSINGNESS_THRESHOLDS) == band(bounds["core_missingness_avg"][1], MISSINGNESS_THRESHOLDS)
+        )
+        info.update({
+            "looks": info["looks"] + 1,
+            "sessions_sampled": m,
+            "windows_sampled": int(n_arr.sum()),
+            "window_frac": window_frac,
+            "estimates": {"typing_presence": typing_p, "tapping_presence": tapping_p, "core_missingness_avg": miss_p},
+            "bounds": {k: [lo, hi] for k, (lo, hi) in bounds.items()},
+        })
+        if settled or m >= budget:
+            break
+
+    if not settled:
+        info["fallback_reason"] = "estimate within error bounds of a gate threshold"
+        return None, info
+    if len(rows) == total_sessions and window_frac >= 1.0:
+        info["fallback_reason"] = "sample covered every session"
+        return None, info
+
+    n_total = float(n_arr.sum())
+    missingness = {}
+    for c in core_features:
+        if c in seen_cols:
+            frac = float(sum(r["missing"][c] for r in rows)) / n_total if n_total else 1.0
+            missingness[c] = {"present_in_schema": 1.0, "missing_frac": frac}
+        else:
+            missingness[c] = {"present_in_schema": 0.0, "missing_frac": 1.0}
+
+    summary = {
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "raw_sessions_dir": str(raw_sessions_dir),
+        "auth_windows_files_found": total_sessions,
+        "participants_count": participants,
+        "sessions_count": total_sessions,
+        "total_windows": int(sum(wps.values())),
+        "schema_bad_rows": schema_bad_rows,
+        "windows_per_session": wps,
+        "typing_presence": typing_p,
+        "tapping_presence": tapping_p,
+        "typing_presence_source": typing_src,
+        "tapping_presence_source": tapping_src,
+        "missingness_core": missingness,
+    }
+    return summary, info
+
+
 def render_md(summary: dict) -> str:
     lines = [
         "# QC Summary",
@@ -166,6 +403,31 @@ def render_md(summary: dict) -> str:
         "",
     ]
 
+    approx = summary.get("approximation")
+    if approx:
+        labels = {
+            "typing_presence": "Typing presence",
+            "tapping_presence": "Tapping presence",
+            "core_missingness_avg": "Core missingness avg",
+        }
+        lines.append("## Approximation")
+        if approx["mode"] == "approximate":
+            lines.append(
+                f"- **Verdict is APPROXIMATE** ({approx['confidence']:.0%} joint confidence), from "
+                f"{approx['sessions_sampled']}/{approx['sessions_total']} sessions and "
+                f"{approx['windows_sampled']} sampled windows."
+            )
+            lines.append("- Schema check, participant and window counts cover every session.")
+        else:
+            lines.append(
+                f"- Sampling stopped after {approx['sessions_sampled']}/{approx['sessions_total']} sessions "
+                f"({approx['fallback_reason']}); verdict computed on the exact path."
+            )
+        for key, (lo, hi) in approx.get("bounds", {}).items():
+            est = approx["estimates"][key]
+            lines.append(f"- {labels[key]}: {est:.1%} (CI {lo:.1%} – {hi:.1%}, ±{(hi - lo) / 2:.1%})")
+        lines.append("")
+
     if summary.get("fail_reasons"):
         lines += ["## Fail reasons"] + [f"- {r}" for r in summary["fail_reasons"]] + [""]
 
@@ -211,35 +473,27 @@ def main() -> int:
             "warn_reasons": [],
         }
     else:
-        df = load_auth(auth_files)
-        wps = windows_per_session(auth_files)
-        participants = int(df["participantId"].nunique(dropna=True)) if "participantId" in df.columns else 0
-        typing_presence, typing_src = inferred_presence_frac(
-            df, "has_typing", ["typing_ikt_global_mean", "typing_ikt_within_mean", "ikt_mean"]
-        )
-        tapping_presence, tapping_src = inferred_presence_frac(
-            df, "has_tapping", ["tap_rt_mean"]
-        )
-        schema_bad_rows = 0
-        if "schemaVersion" in df.columns:
-            v = pd.to_numeric(df["schemaVersion"], errors="coerce")
-            schema_bad_rows = int((v.isna() | (v != args.required_schema_version)).sum())
-
-        summary = {
-            "generated_at_utc": datetime.now(timezone.utc).isoformat(),
-            "raw_sessions_dir": str(raw_sessions_dir),
-            "auth_windows_files_found": len(auth_files),
-            "participants_count": participants,
-            "sessions_count": len(auth_files),
-            "total_windows": int(len(df)),
-            "schema_bad_rows": schema_bad_rows,
-            "windows_per_session": wps,
-            "typing_presence": typing_presence,
-            "tapping_presence": tapping_presence,
-            "typing_presence_source": typing_src,
-            "tapping_presence_source": tapping_src,
-            "missingness_core": missingness_report(df, core_features),
-        }
+        summary, approx_info = None, None
+        if args.approx:
+            summary, approx_info = approximate_summary(
+                auth_files,
+                raw_sessions_dir,
+                core_features,
+                args.required_schema_version,
+                confidence=args.approx_confidence,
+                batch_sessions=args.approx_batch_sessions,
+                max_session_frac=args.approx_max_session_frac,
+                window_frac=args.approx_window_frac,
+                seed=args.seed,
+            )
+        if summary is None:
+            summary = exact_summary(auth_files, raw_sessions_dir, core_features, args.required_schema_version)
+            if approx_info is not None:
+                approx_info["mode"] = "exact_fallback"
+        elif approx_info is not None:
+            approx_info["mode"] = "approximate"
+        if approx_info is not None:
+            summary["approximation"] = approx_info
         verdict, fails, warns = gate(summary, strict=args.strict)
         summary["verdict"] = verdict
         summary["fail_reasons"] = fails
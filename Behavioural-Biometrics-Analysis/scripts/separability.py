@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from build_windows_dataset import DEFAULT_FEATURES
+
+
+NON_BEHAVIOURAL = {"schemaVersion", "session_order", "window_duration_ms"}
+CACHE_VERSION = 1
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Genuine-vs-impostor distances and participant separability matrix.")
+    p.add_argument("--windows", type=str, default="data/processed/windows.parquet")
+    p.add_argument("--reports-dir", type=str, default="reports")
+    p.add_argument("--out-matrix", type=str, default="data/processed/separability_matrix.csv")
+    p.add_argument("--cache", type=str, default="data/processed/separability_cache.npz")
+    p.add_argument("--features", type=str, default=",".join(DEFAULT_FEATURES))
+    p.add_argument("--block-windows", type=int, default=2048)
+    p.add_argument("--block-participants", type=int, default=64)
+    p.add_argument("--bins", type=int, default=128)
+    p.add_argument("--workers", type=int, default=0)
+    return p.parse_args()
+
+
+def load_windows(path: Path) -> pd.DataFrame:
+    if path.suffix.lower() == ".csv":
+        return pd.read_csv(path)
+    return pd.read_parquet(path)
+
+
+def numeric_feature_columns(windows: pd.DataFrame, features: List[str]) -> List[str]:
+    cols = []
+    for c in features:
+        if c not in windows.columns or c in NON_BEHAVIOURAL:
+            continue
+        s = windows[c]
+        if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+            continue
+        if s.notna().any():
+            cols.append(c)
+    return cols
+
+
+def standardized_matrix(windows: pd.DataFrame, cols: List[str]) -> np.ndarray:
+    x = windows[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    med = np.nanmedian(x, axis=0)
+    x = np.where(np.isnan(x), med, x)
+    sd = x.std(axis=0)
+    sd[sd == 0] = 1.0
+    return (x - x.mean(axis=0)) / sd
+
+
+def participant_fingerprints(windows: pd.DataFrame, cols: List[str]) -> Dict[str, str]:
+    keyed = windows[["participantId", "sessionId", "windowIndex"] + cols].sort_values(
+        ["participantId", "sessionId", "windowIndex"], kind="mergesort"
+    )
+    hashes = pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+    out = {}
+    pids = keyed["participantId"].to_numpy()
+    bounds = np.flatnonzero(pids[1:] != pids[:-1]) + 1
+    for seg in np.split(np.arange(len(pids)), bounds):
+        if len(seg):
+            out[str(pids[seg[0]])] = hashlib.sha256(hashes[seg].tobytes()).hexdigest()
+    return out
+
+
+def make_blocks(counts: np.ndarray, block_windows: int, block_participants: int) -> List[np.ndarray]:
+    blocks, cur, cur_windows = [], [], 0
+    for i, n in enumerate(counts):
+        if cur and (cur_windows + n > block_windows or len(cur) >= block_participants):
+            blocks.append(np.array(cur))
+            cur, cur_windows = [], 0
+        cur.append(i)
+        cur_windows += int(n)
+    if cur:
+        blocks.append(np.array(cur))
+    return blocks
+
+
+def distance_edges(x: np.ndarray, bins: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    i = rng.integers(0, n, size=min(20000, n * n))
+    j = rng.integers(0, n, size=len(i))
+    d = np.sqrt(((x[i] - x[j]) ** 2).sum(axis=1))
+    top = float(np.quantile(d, 0.999)) * 1.5 if len(d) else 1.0
+    return np.linspace(0.0, max(top, 1e-9), bins + 1)
+
+
+def pair_histograms(
+    xa: np.ndarray, la: np.ndarray, na: int, xb: np.ndarray, lb: np.ndarray, nb: int,
+    edges: np.ndarray, same_block: bool, chunk: int = 1024,
+) -> np.ndarray:
+    bins = len(edges) - 1
+    hist = np.zeros(na * nb * bins, dtype=np.int64)
+    sq_b = (xb ** 2).sum(axis=1)
+    for s in range(0, len(xa), chunk):
+        a = xa[s:s + chunk]
+        d2 = (a ** 2).sum(axis=1)[:, None] + sq_b[None, :] - 2.0 * (a @ xb.T)
+        d = np.sqrt(np.clip(d2, 0.0, None))
+        b = np.clip(np.searchsorted(edges, d, side="right") - 1, 0, bins - 1)
+        key = (la[s:s + chunk, None] * nb + lb[None, :]) * bins + b
+        if same_block:
+            rows = np.arange(s, s + len(a))[:, None]
+            key = key[rows < np.arange(len(xb))[None, :]]
+        hist += np.bincount(key.ravel(), minlength=len(hist))
+    hist = hist.reshape(na, nb, bins)
+    if same_block:
+        diag = hist[np.arange(na), np.arange(na)].copy()
+        hist = hist + hist.transpose(1, 0, 2)
+        hist[np.arange(na), np.arange(na)] = diag
+    return hist
+
+
+def pair_eer(genuine_a: np.ndarray, genuine_b: np.ndarray, impostor: np.ndarray) -> np.ndarray:
+    # genuine_*: (na, bins) / (nb, bins); impostor: (na, nb, bins). Genuine for a pair pools both participants.
+    gen = genuine_a[:, None, :] + genuine_b[None, :, :]
+    gen_total = gen.sum(axis=2, keepdims=True)
+    imp_total = impostor.sum(axis=2, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frr = 1.0 - np.cumsum(gen, axis=2) / gen_total
+        far = np.cumsum(impostor, axis=2) / imp_total
+        k = np.argmin(np.where(np.isnan(frr - far), np.inf, np.abs(frr - far)), axis=2)
+        eer = (np.take_along_axis(frr, k[..., None], 2) + np.take_along_axis(far, k[..., None], 2))[..., 0] / 2
+    eer[(gen_total[..., 0] == 0) | (imp_total[..., 0] == 0)] = np.nan
+    return eer
+
+
+def _block_task(args: tuple) -> Tuple[int, int, np.ndarray]:
+    bi, bj, xa, la, na, xb, lb, nb, edges, same = args
+    return bi, bj, pair_histograms(xa, la, na, xb, lb, nb, edges, same)
+
+
+def stream_tasks(tasks: Iterator[tuple], pool: Optional[ProcessPoolExecutor], workers: int) -> Iterator[tuple]:
+    if pool is None:
+        yield from map(_block_task, tasks)
+        return
+    # Bounded submission: Executor.map would materialise every task (and its block copies) up front.
+    pending = set()
+    for t in tasks:
+        pending.add(pool.submit(_block_task, t))
+        if len(pending) >= 2 * workers:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+    for fut in as_completed(pending):
+        yield fut.result()
+
+
+def separability(
+    windows: pd.DataFrame,
+    features: Optional[List[str]] = None,
+    block_windows: int = 2048,
+    block_participants: int = 64,
+    bins: int = 128,
+    workers: int = 0,
+    cache_path: Optional[Path] = None,
+) -> dict:
+    features = features if features is not None else DEFAULT_FEATURES
+    windows = windows[windows["participantId"].notna()].copy()
+    windows["participantId"] = windows["participantId"].astype(str)
+    windows = windows.sort_values(["participantId", "sessionId", "windowIndex"], kind="mergesort").reset_index(drop=True)
+    cols = numeric_feature_columns(windows, features)
+    if not cols:
+        raise ValueError("No numeric feature columns available for separability.")
+
+    fingerprints = participant_fingerprints(windows, cols)
+    params = {"version": CACHE_VERSION, "features": cols, "bins": bins}
+    if cache_path is not None and cache_path.exists():
+        cached = np.load(cache_path, allow_pickle=False)
+        meta = json.loads(str(cached["meta"]))
+        if meta["params"] == params and meta["fingerprints"] == fingerprints:
+            return {
+                "participants": meta["participants"],
+                "features": cols,
+                "matrix": cached["matrix"],
+                "genuine_hist": cached["genuine_hist"],
+                "impostor_hist": cached["impostor_hist"],
+                "edges": cached["edges"],
+                "cached": True,
+            }
+
+    x = standardized_matrix(windows, cols)
+    participants, labels = np.unique(windows["participantId"].to_numpy(), return_inverse=True)
+    counts = np.bincount(labels, minlength=len(participants))
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    blocks = make_blocks(counts, block_windows, block_participants)
+    edges = distance_edges(x, bins)
+
+    def block_rows(block: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.arange(starts[block[0]], starts[block[-1] + 1])
+        return x[rows], labels[rows] - block[0]
+
+    def task(bi: int, bj: int) -> tuple:
+        xa, la = block_rows(blocks[bi])
+        xb, lb = block_rows(blocks[bj])
+        return bi, bj, xa, la, len(blocks[bi]), xb, lb, len(blocks[bj]), edges, bi == bj
+
+    p = len(participants)
+    genuine = np.zeros((p, bins), dtype=np.int64)
+    matrix = np.full((p, p), np.nan)
+    impostor_total = np.zeros(bins, dtype=np.int64)
+
+    def fold(bi: int, bj: int, h: np.ndarray) -> None:
+        nonlocal impostor_total
+        a, b = blocks[bi], blocks[bj]
+        if bi == bj:
+            idx = np.arange(len(a))
+            genuine[a] = h[idx, idx]
+            h[idx, idx] = 0
+            impostor_total += h.sum(axis=(0, 1)) // 2
+        else:
+            impostor_total += h.sum(axis=(0, 1))
+        eer = pair_eer(genuine[a], genuine[b], h)
+        matrix[np.ix_(a, b)] = eer
+        matrix[np.ix_(b, a)] = eer.T
+
+    # Diagonal blocks first so every genuine histogram is known before any
+    # off-diagonal pair; each block histogram is folded in and dropped as it arrives.
+    n = len(blocks)
+    diagonal = (task(bi, bi) for bi in range(n))
+    off_diagonal = (task(bi, bj) for bi in range(n) for bj in range(bi + 1, n))
+    use_pool = bool(workers and workers > 1 and n > 1)
+    with (ProcessPoolExecutor(max_workers=workers) if use_pool else nullcontext()) as pool:
+        for tasks in (diagonal, off_diagonal):
+            for bi, bj, h in stream_tasks(tasks, pool, workers):
+                fold(bi, bj, h)
+    np.fill_diagonal(matrix, np.nan)
+
+    result = {
+        "participants": participants.tolist(),
+        "features": cols,
+        "matrix": matrix,
+        "genuine_hist": genuine.sum(axis=0),
+        "impostor_hist": impostor_total,
+        "edges": edges,
+        "cached": False,
+    }
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"params": params, "fingerprints": fingerprints, "participants": result["participants"]}
+        with cache_path.open("wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                matrix=matrix,
+                genuine_hist=result["genuine_hist"],
+                impostor_hist=impostor_total,
+                edges=edges,
+            )
+    return result
+
+
+def global_eer(result: dict) -> Optional[float]:
+    genuine = result["genuine_hist"][None, :]
+    eer = pair_eer(genuine, np.zeros_like(genuine), result["impostor_hist"][None, None, :])
+    v = float(eer[0, 0])
+    return None if np.isnan(v) else v
+
+
+def fmt_pct(v: Optional[float]) -> str:
+    return "n/a" if v is None else f"{v:.1%}"
+
+
+def render_md(summary: dict) -> str:
+    lines = [
+        "# Participant Separability",
+        "",
+        f"- **Generated:** {summary['generated_at_utc']}",
+        f"- **Participants:** {summary['participants_count']}",
+        f"- **Features:** {len(summary['features'])}",
+        f"- **Cached result:** {'yes' if summary['cached'] else 'no'}",
+        "",
+        "## Genuine vs impostor",
+        f"- Global EER: **{fmt_pct(summary['global_eer'])}**",
+        f"- Pair EER median: {fmt_pct(summary['pair_eer_median'])}",
+        "",
+        "## Least separable pairs",
+    ]
+    for pair in summary["least_separable_pairs"]:
+        lines.append(f"- `{pair['a']}` vs `{pair['b']}`: EER={pair['eer']:.1%}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    args = parse_args()
+    features = [c.strip() for c in args.features.split(",") if c.strip()]
+    windows = load_windows(Path(args.windows))
+    result = separability(
+        windows,
+        features=features,
+        block_windows=args.block_windows,
+        block_participants=args.block_participants,
+        bins=args.bins,
+        workers=args.workers,
+        cache_path=Path(args.cache) if args.cache else None,
+    )
+
+    pids = result["participants"]
+    matrix = result["matrix"]
+    out_matrix = Path(args.out_matrix)
+    out_matrix.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(matrix, index=pids, columns=pids).to_csv(out_matrix, index_label="participantId")
+
+    iu = np.triu_indices(len(pids), k=1)
+    pair_vals = matrix[iu]
+    finite = np.isfinite(pair_vals)
+    worst = np.argsort(np.where(finite, -pair_vals, np.inf))[:10]
+    summary = {
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "windows": str(args.windows),
+        "participants_count": len(pids),
+        "features": result["features"],
+        "cached": result["cached"],
+        "global_eer": global_eer(result),
+        "pair_eer_median": float(np.median(pair_vals[finite])) if finite.any() else None,
+        "least_separable_pairs": [
+            {"a": pids[iu[0][k]], "b": pids[iu[1][k]], "eer": float(pair_vals[k])} for k in worst if finite[k]
+        ],
+        "distance_edges": result["edges"].tolist(),
+        "genuine_hist": result["genuine_hist"].tolist(),
+        "impostor_hist": result["impostor_hist"].tolist(),
+    }
+
+    reports = Path(args.reports_dir)
+    reports.mkdir(parents=True, exist_ok=True)
+    (reports / "separability.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    (reports / "separability.md").write_text(render_md(summary), encoding="utf-8")
+    print(f"Wrote {out_matrix}")
+    print(f"Wrote {reports / 'separability.json'}")
+    print(f"Wrote {reports / 'separability.md'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
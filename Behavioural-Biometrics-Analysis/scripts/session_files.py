@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+
+COMPRESSED_SUFFIXES = [".gz", ".zst"]
+
+
+def session_file_variants(name: str) -> List[str]:
+    return [name] + [name + s for s in COMPRESSED_SUFFIXES]
+
+
+def resolve_session_file(session_dir: Path, name: str) -> Optional[Path]:
+    for variant in session_file_variants(name):
+        p = session_dir / variant
+        if p.exists():
+            return p
+    return None
+
+
+def find_session_files(raw_sessions_dir: Path, name: str) -> List[Path]:
+    if not raw_sessions_dir.exists():
+        return []
+    found = []
+    for sdir in sorted(p for p in raw_sessions_dir.iterdir() if p.is_dir()):
+        p = resolve_session_file(sdir, name)
+        if p is not None:
+            found.append(p)
+    return found
+
+
+def read_session_csv(path: Path, **kwargs) -> pd.DataFrame:
+    return pd.read_csv(path, compression="infer", **kwargs)
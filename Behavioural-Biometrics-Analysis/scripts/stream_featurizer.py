@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import math
+from collections import deque
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from session_files import read_session_csv, resolve_session_file
+
+
+WINDOW_MS = 30000
+STEP_MS = 15000
+IKT_CLIP_MS = 2000
+
+SESSION_META_COLUMNS = [
+    "schemaVersion",
+    "sessionId",
+    "participantId",
+    "user_id",
+    "sessionIndex",
+    "session_order",
+    "session_date",
+    "timeBucket",
+    "fatigue",
+    "inputDevice",
+    "device_family",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Replay a session's events.csv through the streaming window featurizer.")
+    p.add_argument("session_dir", type=str)
+    p.add_argument("--out-csv", type=str, default="")
+    p.add_argument("--check", action="store_true", help="Compare replayed windows with the session's auth_windows.csv")
+    return p.parse_args()
+
+
+# The helpers below mirror analysis.features.js so streamed rows match buildAuthWindowsCSV exactly.
+def js_round(x: float) -> int:
+    return int(math.floor(x + 0.5))
+
+
+def js_fixed(x: float, digits: int) -> float:
+    return float(Decimal(x).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def js_mean(xs: List[float]) -> float:
+    total = 0.0
+    for x in xs:
+        total += x
+    return total / len(xs)
+
+
+def js_variance(xs: List[float]) -> Optional[float]:
+    if not xs:
+        return None
+    m = js_mean(xs)
+    return js_mean([(x - m) * (x - m) for x in xs])
+
+
+def js_quantile(s: List[float], q: float) -> float:
+    pos = (len(s) - 1) * q
+    base = int(math.floor(pos))
+    rest = pos - base
+    if base + 1 < len(s):
+        return s[base] + rest * (s[base + 1] - s[base])
+    return s[base]
+
+
+def series_summary(xs: List[float], clip_max: Optional[float] = None) -> Dict[str, Any]:
+    if not xs:
+        return {"n": 0}
+    s = sorted(xs)
+    return {
+        "n": len(xs),
+        "mean": js_round(js_mean(xs)),
+        "std": js_round(math.sqrt(js_variance(xs))),
+        "iqr": js_round(js_quantile(s, 0.75) - js_quantile(s, 0.25)),
+        "p95": js_round(js_quantile(s, 0.95)),
+        "max": s[-1],
+        "clippedPct": js_fixed(100 * sum(1 for x in xs if x >= clip_max) / len(xs), 1) if clip_max else None,
+    }
+
+
+def drift_delta(points: List[tuple], start_ms: float, end_ms: float) -> Optional[int]:
+    mid = (start_ms + end_ms) / 2
+    early = [v for ms, v in points if ms < mid]
+    late = [v for ms, v in points if ms >= mid]
+    if not early or not late:
+        return None
+    return js_round(js_mean(late) - js_mean(early))
+
+
+def is_truthy(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "t", "yes", "y")
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return False
+    return bool(v)
+
+
+def normalize_event(ev: Dict[str, Any]) -> Dict[str, Any]:
+    ms = ev.get("ms")
+    try:
+        ms = float(ms)
+    except (TypeError, ValueError):
+        ms = math.nan
+    rt = ev.get("rt")
+    try:
+        rt = float(rt) if rt is not None and rt != "" else None
+    except ValueError:
+        rt = None
+    if rt is not None and math.isnan(rt):
+        rt = None
+    return {"t": ev.get("t"), "ms": ms, "k": ev.get("k"), "rt": rt, "ok": is_truthy(ev.get("ok"))}
+
+
+class WindowState:
+    __slots__ = ("index", "start_ms", "end_ms", "n_key_events", "n_tap_hits", "n_tap_misses")
+
+    def __init__(self, index: int, start_ms: float):
+        self.index = index
+        self.start_ms = start_ms
+        self.end_ms = start_ms + WINDOW_MS
+        self.n_key_events = 0
+        self.n_tap_hits = 0
+        self.n_tap_misses = 0
+
+
+class StreamingWindowFeaturizer:
+    """Incremental auth-window builder for one live session.
+
+    Events are the dicts buildEventsCSV writes (t/ms/k/rt/ok) and must arrive in
+    nondecreasing ms order. Only events inside still-open windows are buffered,
+    so memory is bounded by the event rate over one 30 s window.
+
+    Only the per-window event counts are running sums. Timing features (IKT and
+    RT means, std, IQR, p95, drift, variances) are rebuilt from the buffer when a
+    window closes, costing O(w log w) per window of w events rather than O(1)
+    per event, so that quantiles and two-pass variances match the batch build
+    exactly.
+    """
+
+    def __init__(self, meta: Optional[Dict[str, Any]] = None, window_ms: int = WINDOW_MS, step_ms: int = STEP_MS):
+        if window_ms != WINDOW_MS or step_ms != STEP_MS:
+            raise ValueError(f"Only {WINDOW_MS} ms windows with {STEP_MS} ms steps match the batch build")
+        self.meta = {c: (meta or {}).get(c) for c in SESSION_META_COLUMNS}
+        if self.meta["user_id"] is None:
+            self.meta["user_id"] = self.meta["participantId"]
+        if self.meta["session_order"] is None:
+            self.meta["session_order"] = self.meta["sessionIndex"]
+        self.buffer: Deque[Dict[str, Any]] = deque()
+        self.open: Deque[WindowState] = deque()
+        self.first_ms: Optional[float] = None
+        self.last_ms: Optional[float] = None
+        self.next_index = 0
+
+    def push(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        ev = normalize_event(event)
+        ms = ev["ms"]
+        if not math.isfinite(ms):
+            return []
+        if self.last_ms is not None and ms < self.last_ms:
+            raise ValueError(f"events must be in nondecreasing ms order ({ms} < {self.last_ms})")
+        if self.first_ms is None:
+            self.first_ms = ms
+        self.last_ms = ms
+
+        out = self._close_until(ms)
+        while self.first_ms + self.next_index * STEP_MS <= ms:
+            w = WindowState(self.next_index, self.first_ms + self.next_index * STEP_MS)
+            self.next_index += 1
+            if w.end_ms < ms:
+                # Window lies entirely inside a pause: it is already closed and holds no events.
+                out.append(self._emit(w))
+            else:
+                self.open.append(w)
+        for w in self.open:
+            if not (w.start_ms <= ms <= w.end_ms):
+                continue
+            if ev["t"] == "key":
+                w.n_key_events += 1
+            elif ev["t"] == "tap_hit":
+                w.n_tap_hits += 1
+            elif ev["t"] == "tap_miss":
+                w.n_tap_misses += 1
+        self.buffer.append(ev)
+        return out
+
+    def push_many(self, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for ev in events:
+            out.extend(self.push(ev))
+        return out
+
+    def close(self) -> List[Dict[str, Any]]:
+        # The batch build only keeps windows that end at or before the last event.
+        out = []
+        while self.open and self.open[0].end_ms <= self.last_ms:
+            out.append(self._emit(self.open.popleft()))
+        self.open.clear()
+        self.buffer.clear()
+        return out
+
+    def _close_until(self, ms: float) -> List[Dict[str, Any]]:
+        out = []
+        while self.open and self.open[0].end_ms < ms:
+            out.append(self._emit(self.open.popleft()))
+        keep_from = self.open[0].start_ms if self.open else ms
+        while self.buffer and self.buffer[0]["ms"] < keep_from:
+            self.buffer.popleft()
+        return out
+
+    def _emit(self, w: WindowState) -> Dict[str, Any]:
+        start, end = w.start_ms, w.end_ms
+        in_w = [e for e in self.buffer if start <= e["ms"] <= end] if start else []
+
+        key_ms = [e["ms"] for e in in_w if e["t"] == "key" and e["k"] in ("K", "B")]
+        raw_ikt = [b - a for a, b in zip(key_ms, key_ms[1:])]
+        ikt_global = [min(d, IKT_CLIP_MS) for d in raw_ikt]
+        ikt_within: List[float] = []
+        last_key = None
+        for e in in_w:
+            if e["t"] == "word_shown":
+                last_key = None
+            elif e["t"] == "key" and e["k"] in ("K", "B"):
+                if last_key is not None:
+                    ikt_within.append(min(e["ms"] - last_key, IKT_CLIP_MS))
+                last_key = e["ms"]
+
+        submits = [e for e in in_w if e["t"] == "typing_submit"]
+        correct = sum(1 for e in submits if e["ok"])
+        hits = [e for e in in_w if e["t"] == "tap_hit"]
+        misses = [e for e in in_w if e["t"] == "tap_miss"]
+        rts = [e["rt"] for e in hits if e["rt"] is not None]
+
+        g = series_summary(ikt_global, IKT_CLIP_MS)
+        wi = series_summary(ikt_within, IKT_CLIP_MS)
+        rt = series_summary(rts)
+        var_ikt = js_variance(ikt_global)
+        var_rt = js_variance(rts)
+        tap_total = w.n_tap_hits + w.n_tap_misses
+
+        row = dict(self.meta)
+        row.update({
+            "schemaVersion": self.meta["schemaVersion"] if self.meta["schemaVersion"] is not None else 2,
+            "has_typing": w.n_key_events > 0,
+            "has_tapping": tap_total > 0,
+            "n_key_events": w.n_key_events,
+            "n_tap_hits": w.n_tap_hits,
+            "n_tap_misses": w.n_tap_misses,
+            "window_duration_ms": int(end - start),
+            "is_low_activity_window": w.n_key_events < 10 or tap_total < 10,
+            "typing_ikt_global_mean": g.get("mean"),
+            "typing_ikt_global_std": g.get("std"),
+            "typing_ikt_global_iqr": g.get("iqr"),
+            "typing_ikt_global_p95": g.get("p95"),
+            "typing_ikt_global_clipped_pct": g.get("clippedPct"),
+            "typing_ikt_within_mean": wi.get("mean"),
+            "typing_ikt_within_std": wi.get("std"),
+            "typing_ikt_within_iqr": wi.get("iqr"),
+            "typing_ikt_within_p95": wi.get("p95"),
+            "typing_ikt_within_clipped_pct": wi.get("clippedPct"),
+            "typing_accuracy_pct": js_round(100 * correct / len(submits)) if submits else 0,
+            "typing_drift_ikt": drift_delta(list(zip(key_ms[1:], ikt_global)), start, end),
+            "typing_error_recovery_wrong_median": None,
+            "tap_rt_mean": rt.get("mean"),
+            "tap_rt_std": rt.get("std"),
+            "tap_rt_iqr": rt.get("iqr"),
+            "tap_rt_p95": rt.get("p95"),
+            "tap_miss_rate_pct": js_round(100 * len(misses) / (len(hits) + len(misses))) if hits or misses else 0,
+            "tap_drift_rt": drift_delta([(e["ms"], e["rt"]) for e in hits], start, end),
+            "tap_error_recovery_miss_median": None,
+            "coupling_var_ikt": var_ikt,
+            "coupling_var_rt": var_rt,
+            "coupling_var_ratio": js_fixed(var_rt / var_ikt, 3) if var_ikt and var_rt else None,
+            "windowIndex": w.index,
+            "windowStartMs": int(start),
+            "windowEndMs": int(end),
+        })
+        return row
+
+
+def session_meta(session_dir: Path, events: pd.DataFrame) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {}
+    auth_path = resolve_session_file(session_dir, "auth_windows.csv")
+    if auth_path is not None:
+        auth = read_session_csv(auth_path, nrows=1)
+        if len(auth):
+            meta = {c: auth.iloc[0][c] for c in SESSION_META_COLUMNS if c in auth.columns}
+    for c in ["schemaVersion", "sessionId", "participantId"]:
+        if c not in meta and c in events.columns and len(events):
+            meta[c] = events.iloc[0][c]
+    return {k: (None if pd.isna(v) else v) for k, v in meta.items()}
+
+
+def compare_with_batch(streamed: pd.DataFrame, batch: pd.DataFrame) -> List[str]:
+    problems = []
+    if len(streamed) != len(batch):
+        problems.append(f"window count differs: streamed {len(streamed)} vs batch {len(batch)}")
+    n = min(len(streamed), len(batch))
+    for c in batch.columns:
+        if c not in streamed.columns:
+            problems.append(f"missing column {c}")
+            continue
+        a = batch[c].iloc[:n].reset_index(drop=True)
+        b = streamed[c].iloc[:n].reset_index(drop=True)
+        an = pd.to_numeric(a.map(lambda v: {"true": 1, "false": 0}.get(str(v).lower(), v)), errors="coerce")
+        bn = pd.to_numeric(b.map(lambda v: {"true": 1, "false": 0}.get(str(v).lower(), v)), errors="coerce")
+        same = (an == bn) | (an.isna() & bn.isna())
+        if an.isna().all() and bn.isna().all():
+            same = a.astype(str).where(a.notna(), "") == b.astype(str).where(b.notna(), "")
+        if not same.all():
+            problems.append(f"{c}: {int((~same).sum())} window(s) differ")
+    return problems
+
+
+def main() -> int:
+    args = parse_args()
+    session_dir = Path(args.session_dir)
+    events_path = resolve_session_file(session_dir, "events.csv")
+    if events_path is None:
+        print(f"{session_dir}: missing events.csv")
+        return 1
+
+    events = read_session_csv(events_path)
+    featurizer = StreamingWindowFeaturizer(session_meta(session_dir, events))
+    rows = featurizer.push_many(events.to_dict("records"))
+    rows += featurizer.close()
+    streamed = pd.DataFrame(rows)
+    print(f"Streamed {len(streamed)} window(s) from {len(events)} event(s)")
+
+    if args.out_csv:
+        streamed.to_csv(args.out_csv, index=False)
+        print(f"Wrote {args.out_csv}")
+
+    if args.check:
+        auth_path = resolve_session_file(session_dir, "auth_windows.csv")
+        if auth_path is None:
+            print(f"{session_dir}: missing auth_windows.csv")
+            return 1
+        batch = read_session_csv(auth_path, float_precision="round_trip")
+        problems = compare_with_batch(streamed, batch)
+        for p in problems:
+            print(f"MISMATCH {p}")
+        print("Check: " + ("FAIL" if problems else "PASS"))
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
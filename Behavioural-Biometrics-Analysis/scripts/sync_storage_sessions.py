@@ -1,6 +1,8 @@
 from pathlib import Path
 from google.cloud import storage
 
+from session_files import resolve_session_file, session_file_variants
+
 # ---------------- CONFIG ----------------
 BUCKET_NAME = "behavioural-biometrics-b52e4.firebasestorage.app"
 REMOTE_PREFIX = "sessions/"
@@ -20,6 +22,7 @@ def main():
 
     blobs = list(client.list_blobs(bucket, prefix=REMOTE_PREFIX))
 
+    remote_names = {b.name for b in blobs}
     session_ids = set()
     for b in blobs:
         parts = b.name.split("/")
@@ -33,18 +36,19 @@ def main():
         local_dir.mkdir(parents=True, exist_ok=True)
 
         for fname in REQUIRED_FILES:
-            blob_path = f"{REMOTE_PREFIX}{sid}/{fname}"
-            local_path = local_dir / fname
-
-            if local_path.exists():
+            if resolve_session_file(local_dir, fname) is not None:
                 continue
 
-            blob = bucket.blob(blob_path)
-            if blob.exists():
-                blob.download_to_filename(local_path)
-                print(f"Downloaded {blob_path}")
+            # Prefer compressed uploads; older sessions only have the plain CSV.
+            candidates = session_file_variants(fname)
+            for variant in candidates[1:] + candidates[:1]:
+                blob_path = f"{REMOTE_PREFIX}{sid}/{variant}"
+                if blob_path in remote_names:
+                    bucket.blob(blob_path).download_to_filename(local_dir / variant)
+                    print(f"Downloaded {blob_path}")
+                    break
             else:
-                print(f"Missing {blob_path}")
+                print(f"Missing {REMOTE_PREFIX}{sid}/{fname}")
 
     print("Done.")
 
@@ -10,6 +10,8 @@ from typing import Dict, List, Tuple
 import numpy as np
 import pandas as pd
 
+from session_files import read_session_csv, resolve_session_file
+
 
 AUTH_REQUIRED = {
     "schemaVersion",
@@ -35,6 +37,13 @@ AUTH_REQUIRED = {
 
 EVENTS_REQUIRED = {"schemaVersion", "sessionId", "participantId", "t", "ms", "tISO"}
 
+WINDOW_COUNT_EVENTS = {
+    "n_key_events": "key",
+    "n_tap_hits": "tap_hit",
+    "n_tap_misses": "tap_miss",
+}
+MAX_LISTED_WINDOWS = 10
+
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser()
@@ -52,6 +61,56 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
+def truthy(s: pd.Series) -> np.ndarray:
+    return s.astype(str).str.strip().str.lower().isin({"1", "true", "t", "yes", "y"}).to_numpy()
+
+
+def recompute_window_counts(auth: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    # Same inclusive [windowStartMs, windowEndMs] bounds as windowEventCounts in the web app.
+    starts = pd.to_numeric(auth["windowStartMs"], errors="coerce").to_numpy(dtype=float)
+    ends = pd.to_numeric(auth["windowEndMs"], errors="coerce").to_numpy(dtype=float)
+    ms = pd.to_numeric(events["ms"], errors="coerce").to_numpy(dtype=float)
+    types = events["t"].to_numpy()
+    valid = np.isfinite(starts) & np.isfinite(ends)
+
+    out = pd.DataFrame(index=auth.index)
+    for col, event_type in WINDOW_COUNT_EVENTS.items():
+        times = np.sort(ms[(types == event_type) & np.isfinite(ms)])
+        counts = np.searchsorted(times, ends, side="right") - np.searchsorted(times, starts, side="left")
+        out[col] = np.where(valid, counts, -1)
+    out["has_typing"] = out["n_key_events"] > 0
+    out["has_tapping"] = (out["n_tap_hits"] + out["n_tap_misses"]) > 0
+    return out
+
+
+def window_count_mismatches(auth: pd.DataFrame, events: pd.DataFrame) -> List[str]:
+    if not {"windowStartMs", "windowEndMs"}.issubset(auth.columns) or not {"t", "ms"}.issubset(events.columns):
+        return []
+    expected = recompute_window_counts(auth, events)
+    bad = np.zeros(len(auth), dtype=bool)
+    cols = []
+    for col in WINDOW_COUNT_EVENTS:
+        if col in auth.columns:
+            diff = pd.to_numeric(auth[col], errors="coerce").to_numpy(dtype=float) != expected[col].to_numpy()
+            if diff.any():
+                cols.append(col)
+            bad |= diff
+    for col in ["has_typing", "has_tapping"]:
+        if col in auth.columns:
+            diff = truthy(auth[col]) != expected[col].to_numpy()
+            if diff.any():
+                cols.append(col)
+            bad |= diff
+    if not bad.any():
+        return []
+    ids = auth["windowIndex"] if "windowIndex" in auth.columns else pd.Series(np.arange(len(auth)))
+    listed = [str(v) for v in ids.to_numpy()[bad][:MAX_LISTED_WINDOWS]]
+    more = " ..." if int(bad.sum()) > MAX_LISTED_WINDOWS else ""
+    return [
+        f"{int(bad.sum())} window(s) disagree with events.csv on {cols}: windowIndex [{', '.join(listed)}{more}]"
+    ]
+
+
 def check_session(
     session_dir: Path,
     min_windows: int,
@@ -63,18 +122,18 @@ def check_session(
     sid = session_dir.name
     issues: List[str] = []
 
-    auth_path = session_dir / "auth_windows.csv"
-    events_path = session_dir / "events.csv"
+    auth_path = resolve_session_file(session_dir, "auth_windows.csv")
+    events_path = resolve_session_file(session_dir, "events.csv")
 
-    if not auth_path.exists():
+    if auth_path is None:
         issues.append("missing auth_windows.csv")
-    if not events_path.exists():
+    if events_path is None:
         issues.append("missing events.csv")
     if issues:
         return {"windows": 0, "events": 0, "typing_submits": 0, "tap_hits": 0}, issues, ""
 
-    auth = pd.read_csv(auth_path)
-    events = pd.read_csv(events_path)
+    auth = read_session_csv(auth_path)
+    events = read_session_csv(events_path)
 
     missing_auth = sorted(AUTH_REQUIRED - set(auth.columns))
     missing_events = sorted(EVENTS_REQUIRED - set(events.columns))
@@ -157,6 +216,8 @@ def check_session(
         if len(parsed) and float(parsed.isna().mean()) > 0.02:
             issues.append("more than 2% invalid tISO values")
 
+    issues.extend(window_count_mismatches(auth, events))
+
     typing_submits = int((events["t"] == "typing_submit").sum()) if "t" in events.columns else 0
     tap_hits = int((events["t"] == "tap_hit").sum()) if "t" in events.columns else 0
     windows = int(len(auth))
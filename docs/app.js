@@ -818,6 +818,18 @@ function csvBlob(text) {
   return new Blob([text], { type: "text/csv;charset=utf-8;" });
 }
 
+// Session CSVs repeat schemaVersion/sessionId/participantId on every row,
+// so gzip shrinks them several-fold. Falls back to plain CSV on browsers
+// without CompressionStream.
+async function sessionFileUpload(name, text) {
+  if (typeof CompressionStream === "undefined") {
+    return { name, blob: csvBlob(text), metadata: { contentType: "text/csv" }, compression: null };
+  }
+  const stream = csvBlob(text).stream().pipeThrough(new CompressionStream("gzip"));
+  const blob = await new Response(stream).blob();
+  return { name: `${name}.gz`, blob, metadata: { contentType: "application/gzip" }, compression: "gzip" };
+}
+
 function buildAuthWindowsCSV(s) {
   const summary = computeSummary(s);
   const windows = generateWindows(s.events, 30000, 15000); // 30s, 50% overlap
@@ -895,9 +907,11 @@ async function uploadSessionToFirebase(s) {
 
   const base = `sessions/${s.sessionId}`;
 
-  await uploadBytes(ref(storage, `${base}/auth_windows.csv`), csvBlob(authCsv));
+  const authFile = await sessionFileUpload("auth_windows.csv", authCsv);
+  await uploadBytes(ref(storage, `${base}/${authFile.name}`), authFile.blob, authFile.metadata);
   if (eventsCsv) {
-    await uploadBytes(ref(storage, `${base}/events.csv`), csvBlob(eventsCsv));
+    const eventsFile = await sessionFileUpload("events.csv", eventsCsv);
+    await uploadBytes(ref(storage, `${base}/${eventsFile.name}`), eventsFile.blob, eventsFile.metadata);
   }
 
   await addDoc(collection(db, "sessions"), {
@@ -909,7 +923,8 @@ async function uploadSessionToFirebase(s) {
     context: s.context ?? {},
     device: s.device ?? {},
     eventCount: (s.events || []).length,
-    hasEventsCsv: Boolean(eventsCsv)
+    hasEventsCsv: Boolean(eventsCsv),
+    fileCompression: authFile.compression
   });
 }
 